@@ -1,16 +1,42 @@
+import functools
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+import textwrap
+import threading
+import time
+import weakref
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import closing
+
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
 import pandas as pd
 from rdflib import Graph, RDF, RDFS, OWL, Namespace
 
-import networkx as nx
 from pyvis.network import Network
 import streamlit.components.v1 as components
 
 from rdflib import URIRef
+from rdflib.plugins.sparql import prepareQuery
 from rdflib.namespace import RDF
 
 import json
+from collections import OrderedDict, defaultdict, deque
+
+try:
+    import oxrdflib  # noqa: F401  (registers the "Oxigraph" rdflib store plugin)
+except ImportError:
+    oxrdflib = None
+
+try:
+    import orjson  # optional: C JSON encoder for the graph downloads
+except ImportError:
+    orjson = None
 
 # -------------------------------------------------------------------
 # Config: repo details
@@ -22,23 +48,55 @@ DEFAULT_BRANCH = "main"
 
 ONTOLOGY_DIR = "ontology"
 
-GITHUB_API_BASE = f"https://api.github.com/repos/{OWNER}/{REPO}/contents/{ONTOLOGY_DIR}"
+GITHUB_TREES_BASE = f"https://api.github.com/repos/{OWNER}/{REPO}/git/trees"
+GITHUB_CONTENTS_BASE = f"https://api.github.com/repos/{OWNER}/{REPO}/contents"
 GITHUB_RAW_BASE = f"https://raw.githubusercontent.com/{OWNER}/{REPO}"
 
 # You can tweak these if you add more dirs later
 TTL_SEARCH_PATHS = [
     "",            # repo root
-    "ontology",    # ontology directory (future/now)
+    ONTOLOGY_DIR,  # ontology directory (future/now)
 ]
 
+# Persistent HTTP / parsed-graph caches shared across sessions and restarts
+CACHE_DB_PATH = os.environ.get("ONTOLOGY_VIEW_CACHE_DB", "cache.db")
+GRAPH_CACHE_DIR = os.environ.get("ONTOLOGY_VIEW_GRAPH_CACHE", "graph_cache")
+# Snapshots kept in GRAPH_CACHE_DIR; the least recently used go first
+GRAPH_CACHE_MAX_FILES = int(os.environ.get("ONTOLOGY_VIEW_GRAPH_CACHE_FILES", "32"))
+
+# rdflib store backing every loaded graph: the Rust/Oxigraph store when
+# oxrdflib is installed (indexed lookups + native SPARQL), else rdflib's own.
+# ONTOLOGY_VIEW_STORE=rdflib keeps rdflib's pure-Python store regardless.
+STORE_PREFERENCE = os.environ.get("ONTOLOGY_VIEW_STORE", "auto").lower()
+GRAPH_STORE = (
+    "Oxigraph"
+    if oxrdflib is not None and STORE_PREFERENCE != "rdflib"
+    else "default"
+)
+
 
 # -------------------------------------------------------------------
 # Helpers: GitHub + RDF
 # -------------------------------------------------------------------
 
-def graph_to_json_dict(G: nx.DiGraph):
+class MiniGraph:
+    """
+    Minimal directed graph for the render-only graph views (nothing here
+    needs networkx algorithms, only its bookkeeping):
+      - nodes: {iri: {"label": ..., "role": ...}}
+      - edges: [(source, target, relation)]
+    """
+
+    __slots__ = ("nodes", "edges")
+
+    def __init__(self):
+        self.nodes = {}
+        self.edges = []
+
+
+def graph_to_json_dict(G: MiniGraph):
     """
-    Convert a NetworkX DiGraph into a JSON-serializable dict
+    Convert a MiniGraph into a JSON-serializable dict
     with nodes and edges.
     """
     return {
@@ -48,18 +106,30 @@ def graph_to_json_dict(G: nx.DiGraph):
                 "label": data.get("label"),
                 "role": data.get("role"),
             }
-            for node, data in G.nodes(data=True)
+            for node, data in G.nodes.items()
         ],
         "edges": [
             {
                 "source": src,
                 "target": dst,
-                "relation": data.get("relation", ""),
+                "relation": relation,
             }
-            for src, dst, data in G.edges(data=True)
+            for src, dst, relation in G.edges
         ],
     }
 
+
+def graph_to_json_text(G: MiniGraph) -> str:
+    """
+    Indented JSON text of graph_to_json_dict(G), encoded with orjson
+    when it is installed and the standard json module otherwise.
+    """
+    data = graph_to_json_dict(G)
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+
 def build_property_graph(graph: Graph, prop_uri):
     """
     Build a small graph centered on a property:
@@ -71,298 +141,443 @@ def build_property_graph(graph: Graph, prop_uri):
       - 'domain'
       - 'range'
     """
-    G = nx.DiGraph()
+    G = MiniGraph()
+    idx = build_indexes(graph)
 
     prop_str = str(prop_uri)
-    prop_label = get_label(graph, prop_uri)
+    prop_label = get_label(idx, prop_str)
 
-    G.add_node(prop_str, label=prop_label, role="property")
+    G.nodes[prop_str] = {"label": prop_label, "role": "property"}
 
     # Domains: class -> property
-    for d in graph.objects(prop_uri, RDFS.domain):
-        d_str = str(d)
-        d_label = get_label(graph, d)
-        G.add_node(d_str, label=d_label, role="domain")
-        G.add_edge(d_str, prop_str, relation="domainOf")
+    for d_str in idx["domains"].get(prop_str, ()):
+        d_label = get_label(idx, d_str)
+        G.nodes[d_str] = {"label": d_label, "role": "domain"}
+        G.edges.append((d_str, prop_str, "domainOf"))
 
     # Ranges: property -> class
-    for r in graph.objects(prop_uri, RDFS.range):
-        r_str = str(r)
-        r_label = get_label(graph, r)
-        G.add_node(r_str, label=r_label, role="range")
-        G.add_edge(prop_str, r_str, relation="rangeOf")
+    for r_str in idx["ranges"].get(prop_str, ()):
+        r_label = get_label(idx, r_str)
+        G.nodes[r_str] = {"label": r_label, "role": "range"}
+        G.edges.append((prop_str, r_str, "rangeOf"))
 
     return G
 
 
-def _property_row(graph: Graph, p, kind: str):
-    label = get_label(graph, p)
-    comment = get_comment(graph, p)
-    domains = [get_label(graph, d) for d in graph.objects(p, RDFS.domain)]
-    ranges = [get_label(graph, r) for r in graph.objects(p, RDFS.range)]
-    return {
-        "Label": label,
-        "IRI": str(p),
-        "Kind": kind,
-        "Domain": ", ".join(domains),
-        "Range": ", ".join(ranges),
-        "Comment": comment,
-    }
-
-
-def extract_properties(graph: Graph):
-    """
-    Return DataFrame of properties, trying to be robust to:
-    - owl:ObjectProperty
-    - owl:DatatypeProperty
-    - owl:AnnotationProperty
-    - rdf:Property
-    - Untyped properties that have rdfs:domain or rdfs:range
-
-    The DataFrame has a 'Kind' column indicating the inferred type.
-    """
-    props = set()
-
-    # Explicit types
-    for p in graph.subjects(RDF.type, OWL.ObjectProperty):
-        props.add(p)
-    for p in graph.subjects(RDF.type, OWL.DatatypeProperty):
-        props.add(p)
-    for p in graph.subjects(RDF.type, OWL.AnnotationProperty):
-        props.add(p)
-    for p in graph.subjects(RDF.type, RDF.Property):
-        props.add(p)
-
-    # Also anything with a domain or range
-    for p in graph.subjects(RDFS.domain, None):
-        props.add(p)
-    for p in graph.subjects(RDFS.range, None):
-        props.add(p)
-
-    rows = []
-    for p in props:
-        types = set(graph.objects(p, RDF.type))
-
-        if OWL.ObjectProperty in types:
-            kind = "Object"
-        elif OWL.DatatypeProperty in types:
-            kind = "Datatype"
-        elif OWL.AnnotationProperty in types:
-            kind = "Annotation"
-        elif RDF.Property in types:
-            kind = "Generic"
-        else:
-            # Untyped, but used in domain/range
-            kind = "Unknown"
-
-        rows.append(_property_row(graph, p, kind=kind))
-
-    if not rows:
-        return pd.DataFrame(columns=["Label", "IRI", "Kind", "Domain", "Range", "Comment"])
-
-    df = pd.DataFrame(rows).sort_values(["Kind", "Label"])
-    return df.reset_index(drop=True)
-
 def describe_node(graph: Graph, iri_str: str):
     """
     Return a dict of details for a given node IRI string:
     label, comment, types, parents, children, properties (domain/range).
     """
-    uri = URIRef(iri_str)
-
-    label = get_label(graph, uri)
-    comment = get_comment(graph, uri)
+    idx = build_indexes(graph)
 
-    types = [str(t) for t in graph.objects(uri, RDF.type)]
-
-    parents = [
-        f"{get_label(graph, p)} ({p})"
-        for p in graph.objects(uri, RDFS.subClassOf)
-    ]
-
-    children = [
-        f"{get_label(graph, c)} ({c})"
-        for c in graph.subjects(RDFS.subClassOf, uri)
-    ]
-
-    # Properties where this node is domain or range
-    props_as_domain = [
-        f"{get_label(graph, p)} ({p})"
-        for p in graph.subjects(RDFS.domain, uri)
-    ]
-    props_as_range = [
-        f"{get_label(graph, p)} ({p})"
-        for p in graph.subjects(RDFS.range, uri)
-    ]
+    def labelled(iris):
+        return [f"{get_label(idx, i)} ({i})" for i in iris]
 
     return {
-        "label": label,
+        "label": get_label(idx, iri_str),
         "iri": iri_str,
-        "comment": comment,
-        "types": types,
-        "parents": parents,
-        "children": children,
-        "props_as_domain": props_as_domain,
-        "props_as_range": props_as_range,
+        "comment": idx["comments"].get(iri_str, ""),
+        "types": list(idx["types_of"].get(iri_str, ())),
+        "parents": labelled(idx["subclass_parents"].get(iri_str, ())),
+        "children": labelled(idx["subclass_children"].get(iri_str, ())),
+        # Properties where this node is domain or range
+        "props_as_domain": labelled(idx["domain_props"].get(iri_str, ())),
+        "props_as_range": labelled(idx["range_props"].get(iri_str, ())),
     }
 
+
 def build_class_subclass_graph(graph: Graph, focus_uri, max_depth: int = 2):
     """
-    Build a networkx DiGraph of rdfs:subClassOf relationships
+    Build a MiniGraph of rdfs:subClassOf relationships
     around the focus_uri up to max_depth.
 
     Node attributes:
       - label: human-friendly label
       - role: 'focus' | 'ancestor' | 'descendant' | 'other'
     """
-    G = nx.DiGraph()
-    visited = set()
-    roles = {}  # iri_str -> role
-
-    def set_role(iri_str, new_role):
-        """Keep 'focus' if already; otherwise allow ancestor/descendant."""
-        old = roles.get(iri_str)
-        if old == "focus":
-            return
-        if old is None:
-            roles[iri_str] = new_role
-        else:
-            # if something is both ancestor/descendant, you could mark 'other'
-            # but ancestor/descendant overlap is rare in clean hierarchies
-            roles[iri_str] = old
-
-    def add_neighbourhood(uri, depth_left, origin_role=None):
-        if depth_left < 0:
-            return
+    idx = build_indexes(graph)
+    parents_of = idx["subclass_parents"]
+    children_of = idx["subclass_children"]
 
-        uri_str = str(uri)
-        if uri_str in visited:
-            return
-        visited.add(uri_str)
-
-        label = get_label(graph, uri)
-        G.add_node(uri_str, label=label)
-
-        # Parents: uri rdfs:subClassOf parent
-        for parent in graph.objects(uri, RDFS.subClassOf):
-            parent_str = str(parent)
-            parent_label = get_label(graph, parent)
-            G.add_node(parent_str, label=parent_label)
-            G.add_edge(parent_str, uri_str, relation="subClassOf")
-            set_role(parent_str, "ancestor")
-            add_neighbourhood(parent, depth_left - 1, origin_role="ancestor")
-
-        # Children: child rdfs:subClassOf uri
-        for child in graph.subjects(RDFS.subClassOf, uri):
-            child_str = str(child)
-            child_label = get_label(graph, child)
-            G.add_node(child_str, label=child_label)
-            G.add_edge(uri_str, child_str, relation="subClassOf")
-            set_role(child_str, "descendant")
-            add_neighbourhood(child, depth_left - 1, origin_role="descendant")
-
-    # Focus node role
     focus_str = str(focus_uri)
-    set_role(focus_str, "focus")
 
-    # Build neighbourhood
-    add_neighbourhood(focus_uri, max_depth)
+    # First role assigned wins, so the focus keeps 'focus'. A node that is
+    # both ancestor and descendant is rare in clean hierarchies.
+    roles = {focus_str: "focus"}  # iri_str -> role
+    edges = []
+
+    # Breadth-first over the parent/child indexes: nodes within max_depth
+    # are expanded, their direct neighbours are shown but not expanded
+    visited = {focus_str}
+    queue = deque([(focus_str, 0)])
+    while queue:
+        node, depth = queue.popleft()
+
+        # Parents: node rdfs:subClassOf parent
+        for parent in parents_of.get(node, ()):
+            edges.append((parent, node))
+            roles.setdefault(parent, "ancestor")
+            if depth < max_depth and parent not in visited:
+                visited.add(parent)
+                queue.append((parent, depth + 1))
+
+        # Children: child rdfs:subClassOf node
+        for child in children_of.get(node, ()):
+            edges.append((node, child))
+            roles.setdefault(child, "descendant")
+            if depth < max_depth and child not in visited:
+                visited.add(child)
+                queue.append((child, depth + 1))
+
+    G = MiniGraph()
+    G.nodes = {
+        node: {"label": get_label(idx, node), "role": role}
+        for node, role in roles.items()
+    }
+    # An edge is seen from both of its ends when both get expanded
+    G.edges = [(src, dst, "subClassOf") for src, dst in dict.fromkeys(edges)]
+    return G
 
-    # Attach role attributes to nodes (default to 'other')
-    for node in G.nodes:
-        role = roles.get(node, "other")
-        G.nodes[node]["role"] = role
 
-    return G
+# Simple color map for node roles in graph views
+ROLE_COLORS = {
+    "focus": "#ffcc00",       # bright yellow
+    "ancestor": "#1f77b4",    # blue
+    "descendant": "#2ca02c",  # green
+    "property": "#ff7f0e",    # orange
+    "domain": "#9467bd",      # purple
+    "range": "#17becf",       # teal
+    "other": "#aaaaaa",       # grey
+}
 
 
-def render_graph_pyvis(G: nx.DiGraph, height: str = "600px"):
+def render_graph_pyvis(G: MiniGraph, height: str = "600px"):
     """
-    Render a networkx graph using pyvis and return HTML
+    Render a MiniGraph using pyvis and return HTML
     that can be embedded in Streamlit.
     Colors nodes based on their 'role' attribute.
     """
     net = Network(height=height, width="100%", directed=True, notebook=False)
 
-    # Simple color map for roles
-    role_colors = {
-        "focus": "#ffcc00",       # bright yellow
-        "ancestor": "#1f77b4",    # blue
-        "descendant": "#2ca02c",  # green
-        "property": "#ff7f0e",    # orange
-        "domain": "#9467bd",      # purple
-        "range": "#17becf",       # teal
-        "other": "#aaaaaa",       # grey
-    }
-
-
-    # Add nodes
-    for node, data in G.nodes(data=True):
-        label = data.get("label", node)
+    # Fill pyvis' node/edge dicts directly (same fields add_node/add_edge
+    # would produce) instead of going through them one item at a time.
+    # Bound-method aliases keep attribute lookups out of the per-node loop.
+    color_of = ROLE_COLORS.get
+    nodes = []
+    append = nodes.append
+    for node, data in G.nodes.items():
+        label = data.get("label") or node
         role = data.get("role", "other")
-        color = role_colors.get(role, "#aaaaaa")
+        append({
+            "id": node,
+            "label": label,
+            # Tooltip shows role + full IRI
+            "title": f"{label}<br><b>Role:</b> {role}<br><b>IRI:</b> {node}",
+            "color": color_of(role, "#aaaaaa"),
+            "shape": "dot",
+        })
+    net.nodes = nodes
+    net.node_ids = list(G.nodes)
+
+    net.edges = [
+        {
+            "from": src,
+            "to": dst,
+            "title": relation,
+            "arrows": "to",
+        }
+        for src, dst, relation in G.edges
+    ]
 
-        # Tooltip shows role + full IRI
-        title = f"{label}<br><b>Role:</b> {role}<br><b>IRI:</b> {node}"
+    # Use pyvis defaults (no custom JSON options to avoid parsing issues);
+    # the HTML is generated in memory, no graph.html round trip on disk
+    return net.generate_html(notebook=False)
 
-        net.add_node(
-            node,
-            label=label,
-            title=title,
-            color=color,
-        )
 
-    # Add edges
-    for src, dst, data in G.edges(data=True):
-        rel = data.get("relation", "subClassOf")
-        net.add_edge(src, dst, title=rel)
+def _cache_db():
+    """Open the on-disk HTTP cache, creating its table on first use."""
+    conn = sqlite3.connect(CACHE_DB_PATH)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS http_cache ("
+        " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB)"
+    )
+    return conn
+
+
+# Process-wide objects (this session, the memos and prepared queries below)
+# are returned by st.cache_resource functions rather than kept in module
+# globals: Streamlit re-executes this script on every rerun, which would
+# rebuild module-level state each time.
+@st.cache_resource(show_spinner=False)
+def _http_session():
+    """Keep-alive session reused for every GitHub request."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    session.headers.update({"Accept-Encoding": "gzip", "User-Agent": "ontology-view"})
+    if os.environ.get("GITHUB_TOKEN"):
+        # Authenticated requests get 5000/h instead of 60/h from the GitHub API
+        session.headers["Authorization"] = f"Bearer {os.environ['GITHUB_TOKEN']}"
+    return session
+
+
+def cached_get(url: str):
+    """
+    GET a URL, revalidating against the on-disk cache.
 
-    # Use pyvis defaults (no custom JSON options to avoid parsing issues)
-    net.write_html("graph.html", open_browser=False)
-    with open("graph.html", "r", encoding="utf-8") as f:
-        html = f.read()
-    return html
+    Sends If-None-Match / If-Modified-Since when a cached copy exists and
+    returns the cached body on HTTP 304 (which does not count against the
+    GitHub rate limit). If GitHub is unreachable, a cached copy is served.
+
+    Returns (body_bytes, etag).
+    """
+    with closing(_cache_db()) as conn:
+        row = conn.execute(
+            "SELECT etag, last_modified, body FROM http_cache WHERE url = ?",
+            (url,),
+        ).fetchone()
+
+        headers = {}
+        if row:
+            etag, last_modified, _ = row
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        try:
+            resp = _http_session().get(url, headers=headers)
+        except requests.RequestException:
+            if row:
+                return row[2], row[0]
+            raise
+
+        if resp.status_code == 304 and row:
+            return row[2], row[0]
+
+        resp.raise_for_status()
+
+        etag = resp.headers.get("ETag")
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?)",
+                (url, etag, resp.headers.get("Last-Modified"), resp.content),
+            )
+        return resp.content, etag
 
 
 @st.cache_data(show_spinner=False)
 def list_ttl_files(branch: str = DEFAULT_BRANCH):
-    """Return list of (path, name) for all .ttl files in /ontology."""
-    url = f"{GITHUB_API_BASE}?ref={branch}"
-    resp = requests.get(url)
+    """
+    Return list of (path, name) for all .ttl files in TTL_SEARCH_PATHS.
 
-    if resp.status_code != 200:
+    Uses the recursive Git Trees API, so every directory is covered by a
+    single request. GitHub truncates very large trees; in that case each
+    search path is listed through the Contents API instead.
+    """
+    # Branch names may contain "/", which the API would read as a sub-path
+    url = f"{GITHUB_TREES_BASE}/{quote(branch, safe='')}?recursive=1"
+    try:
+        body, _ = cached_get(url)
+    except requests.RequestException:
         return []
 
+    listing = json.loads(body)
+    if listing.get("truncated"):
+        return _list_ttl_files_by_directory(branch)
+
     ttl_files = []
-    for item in resp.json():
-        if item["type"] == "file" and item["name"].endswith(".ttl"):
+    for item in listing.get("tree", []):
+        path = item["path"]
+        if item["type"] != "blob" or not path.endswith(".ttl"):
+            continue
+        directory, _, name = path.rpartition("/")
+        if directory in TTL_SEARCH_PATHS:
             ttl_files.append({
-                "name": item["name"],
-                "path": item["path"],   # e.g. "ontology/dfo-salmon.ttl"
+                "name": name,
+                "path": path,   # e.g. "ontology/dfo-salmon.ttl"
+                "sha": item["sha"],
             })
 
     return sorted(ttl_files, key=lambda x: x["name"])
 
 
-@st.cache_data(show_spinner=True)
-def load_graph_from_github(path: str, branch: str = DEFAULT_BRANCH):
-    """Fetch TTL from GitHub raw and parse into an rdflib Graph."""
-    raw_url = f"{GITHUB_RAW_BASE}/{branch}/{path}"
-    resp = requests.get(raw_url)
-    resp.raise_for_status()
+def _list_ttl_files_by_directory(branch: str):
+    """list_ttl_files fallback: one Contents API call per TTL_SEARCH_PATHS entry."""
+    ttl_files = []
+    for directory in TTL_SEARCH_PATHS:
+        url = f"{GITHUB_CONTENTS_BASE}/{directory}?ref={quote(branch, safe='')}"
+        try:
+            body, _ = cached_get(url)
+        except requests.RequestException as e:
+            response = getattr(e, "response", None)
+            if response is None or response.status_code != 404:
+                # A missing search directory is fine; anything else loses files
+                st.warning(
+                    f"Could not list `{directory or '/'}` on GitHub; "
+                    "some .ttl files may be missing."
+                )
+            continue
+        for item in json.loads(body):
+            if item["type"] == "file" and item["name"].endswith(".ttl"):
+                ttl_files.append({
+                    "name": item["name"],
+                    "path": item["path"],
+                    "sha": item["sha"],
+                })
+
+    return sorted(ttl_files, key=lambda x: x["name"])
+
+
+def _snapshot_path(version: str):
+    """N-Triples snapshot file for one version (blob SHA) of a TTL file."""
+    name = hashlib.sha1(version.encode("utf-8")).hexdigest()
+    return os.path.join(GRAPH_CACHE_DIR, f"{name}.nt")
+
+
+def _namespaces_path(snapshot: str):
+    """Prefix bindings saved next to a snapshot (N-Triples has no prefixes)."""
+    return snapshot[: -len(".nt")] + ".ns.json"
+
+
+def _read_snapshot(g: Graph, snapshot: str):
+    """
+    Parse `snapshot` into `g` and restore its prefix bindings.
+
+    Returns False (leaving `g` untouched) when the snapshot or its
+    namespace file is missing, e.g. evicted or written by an older version.
+    """
+    try:
+        with open(_namespaces_path(snapshot), "rb") as f:
+            namespaces = json.loads(f.read())
+        g.parse(snapshot, format="nt")
+    except FileNotFoundError:
+        return False
+    for prefix, namespace in namespaces.items():
+        g.bind(prefix, URIRef(namespace))
+    try:
+        # mtime doubles as "last used" for _prune_snapshots
+        os.utime(snapshot)
+    except OSError:
+        pass
+    return True
+
+
+def _write_atomic(path: str, write):
+    """Write a file through a unique temp file, then rename it into place."""
+    # Loads run on worker threads and sessions share the process, so two
+    # writers of one snapshot must not collide
+    with tempfile.NamedTemporaryFile(
+        dir=GRAPH_CACHE_DIR, suffix=".tmp", delete=False
+    ) as tmp:
+        write(tmp)
+    os.replace(tmp.name, path)
+
+
+def _prune_snapshots():
+    """Delete the least recently used snapshots beyond GRAPH_CACHE_MAX_FILES."""
+    snapshots = []
+    with os.scandir(GRAPH_CACHE_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(".nt"):
+                try:
+                    snapshots.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+    snapshots.sort(reverse=True)
+    for _, snapshot in snapshots[GRAPH_CACHE_MAX_FILES:]:
+        for path in (snapshot, _namespaces_path(snapshot)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _load_github_ttl(raw_url: str, sha: str | None = None):
+    """
+    Load one TTL file from GitHub raw into an rdflib Graph.
 
-    g = Graph()
-    g.parse(data=resp.text, format="turtle")
+    After the first parse the graph is written to GRAPH_CACHE_DIR as
+    N-Triples (line-oriented, much cheaper to parse than Turtle), keyed by
+    the git blob SHA of the bytes that were parsed, with the file's prefix
+    bindings alongside. When the listing's SHA already has a snapshot, no
+    HTTP request is made at all.
+    """
+    g = Graph(store=GRAPH_STORE)
+
+    if sha and _read_snapshot(g, _snapshot_path(sha)):
+        return g
+
+    # raw_url serves the branch head, which can be newer than the (cached)
+    # listing, so the snapshot is keyed on the fetched content, not `sha`
+    body, _ = cached_get(raw_url)
+    snapshot = _snapshot_path(_blob_sha(body))
+    if _read_snapshot(g, snapshot):
+        return g
+
+    # Parse straight from the downloaded bytes (no decoded str copy)
+    g.parse(source=io.BytesIO(body), format="turtle")
+
+    # Namespaces first: _read_snapshot only trusts a snapshot that has them
+    os.makedirs(GRAPH_CACHE_DIR, exist_ok=True)
+    namespaces = {prefix: str(namespace) for prefix, namespace in g.namespaces()}
+    _write_atomic(
+        _namespaces_path(snapshot),
+        lambda f: f.write(json.dumps(namespaces).encode("utf-8")),
+    )
+    _write_atomic(
+        snapshot,
+        lambda f: g.serialize(destination=f, format="nt", encoding="utf-8"),
+    )
+    _prune_snapshots()
+    return g
+
+
+def _blob_sha(body: bytes):
+    """Git blob SHA-1 of `body`: the id the Trees API lists for that content."""
+    return hashlib.sha1(b"blob %d\0" % len(body) + body).hexdigest()
+
+
+@st.cache_resource(show_spinner=True)
+def load_graphs_from_github(paths: tuple, branch: str = DEFAULT_BRANCH, shas: tuple = ()):
+    """
+    Fetch several TTL files from GitHub raw and merge them into one Graph.
+
+    Files load concurrently, so wall time is roughly the slowest round
+    trip rather than the sum of all of them. `shas` are the blob SHAs from
+    list_ttl_files, used to reuse on-disk snapshots without any request.
+    """
+    raw_urls = [f"{GITHUB_RAW_BASE}/{branch}/{path}" for path in paths]
+    shas = tuple(shas) or (None,) * len(raw_urls)
+    with ThreadPoolExecutor(max_workers=min(8, len(raw_urls))) as pool:
+        graphs = list(pool.map(_load_github_ttl, raw_urls, shas))
+
+    if len(graphs) == 1:
+        g = graphs[0]
+    else:
+        g = Graph(store=GRAPH_STORE)
+        for part in graphs:
+            g += part
+            # += copies triples only; keep each file's prefixes for SPARQL
+            for prefix, namespace in part.namespaces():
+                g.bind(prefix, namespace)
+
+    # Cheap identity for per-graph caches (see graph_fingerprint)
+    g._graph_key = ("github", branch, tuple(paths), shas)
     return g
 
 
+def load_graph_from_github(path: str, branch: str = DEFAULT_BRANCH, sha: str | None = None):
+    """Fetch TTL from GitHub raw and parse into an rdflib Graph."""
+    return load_graphs_from_github((path,), branch=branch, shas=(sha,))
+
+
 def load_graph_from_upload(uploaded_file, fmt: str | None = None):
     """
     Parse an uploaded ontology file (ttl/owl/rdf/xml) into an rdflib Graph.
     If fmt is None, try to guess from the file extension.
     """
-    data = uploaded_file.read()
-    text = data.decode("utf-8", errors="ignore")
+    data = uploaded_file.getvalue()
 
     name = uploaded_file.name.lower()
 
@@ -375,79 +590,144 @@ def load_graph_from_upload(uploaded_file, fmt: str | None = None):
             # reasonable default guess
             fmt = "turtle"
 
-    g = Graph()
-    g.parse(data=text, format=fmt)
+    # Reruns with the same file only pay for the digest, not a re-parse
+    return _parse_upload(hashlib.sha1(data).hexdigest(), fmt, data)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _parse_upload(digest: str, fmt: str, _data: bytes):
+    """
+    Parse uploaded bytes once per (content digest, format). `_data` is left
+    out of the cache key (leading underscore), so Streamlit never hashes the
+    file body itself.
+    """
+    # Hand rdflib the bytes directly: no full decode pass or str copy, and
+    # RDF/XML keeps honouring its own encoding declaration
+    g = Graph(store=GRAPH_STORE)
+    g.parse(source=io.BytesIO(_data), format=fmt)
+    g._graph_key = ("upload", digest, fmt)
     return g
 
 
 
-def get_label(graph: Graph, uri):
-    """Return rdfs:label or last fragment of IRI."""
-    label = graph.value(uri, RDFS.label)
-    if label:
-        return str(label)
-    # fallback: fragment after # or /
-    s = str(uri)
-    return s.split("#")[-1].split("/")[-1]
+def _fragment(iri: str):
+    """Return the last fragment of an IRI (after # or /), or the IRI itself."""
+    return iri.rpartition("#")[2].rpartition("/")[2] or iri
 
 
-def get_comment(graph: Graph, uri):
-    comment = graph.value(uri, RDFS.comment)
-    return str(comment) if comment else ""
+def _fragments(iris: pd.Series):
+    """Vectorised _fragment over a Series of IRI strings."""
+    frags = iris.str.rpartition("#")[2].str.rpartition("/")[2]
+    return frags.where(frags != "", iris)
 
 
-def extract_classes(graph: Graph):
-    """Return DataFrame of classes."""
-    rows = []
-    # owl:Class and rdfs:Class
-    for c in set(
-        list(graph.subjects(RDF.type, OWL.Class))
-        + list(graph.subjects(RDF.type, RDFS.Class))
-    ):
-        label = get_label(graph, c)
-        comment = get_comment(graph, c)
-        parents = [get_label(graph, p) for p in graph.objects(c, RDFS.subClassOf)]
-        rows.append(
-            {
-                "Label": label,
-                "IRI": str(c),
-                "SubClassOf": ", ".join(parents),
-                "Comment": comment,
-            }
-        )
-    df = pd.DataFrame(rows).sort_values("Label")
-    return df.reset_index(drop=True)
+@st.cache_resource(show_spinner=False)
+def _index_memo():
+    """Per-graph indexes; entries vanish with their Graph."""
+    return weakref.WeakKeyDictionary()
 
 
-def extract_properties(graph: Graph):
-    """Return DataFrames for object and datatype properties."""
-    obj_rows = []
-    dt_rows = []
+def build_indexes(graph: Graph):
+    """
+    Scan the graph once and return dict indexes, all keyed by IRI string:
+      - labels / comments: iri -> text
+      - types_of: iri -> [rdf:type]; by_type: rdf:type -> [iri]
+      - domains / ranges: property -> [class]
+      - domain_props / range_props: class -> [property]
+      - subclass_parents / subclass_children: class -> [class]
+    Computed once per graph; every lookup afterwards is a dict hit.
+    """
+    memo = _index_memo()
+    idx = memo.get(graph)
+    if idx is not None:
+        return idx
+
+    labels, comments = {}, {}
+    types_of, by_type = defaultdict(list), defaultdict(list)
+    domains, ranges = defaultdict(list), defaultdict(list)
+    domain_props, range_props = defaultdict(list), defaultdict(list)
+    parents, children = defaultdict(list), defaultdict(list)
+
+    for s, p, o in graph:
+        if p == RDFS.label:
+            labels.setdefault(str(s), str(o))
+        elif p == RDFS.comment:
+            comments.setdefault(str(s), str(o))
+        elif p == RDF.type:
+            types_of[str(s)].append(str(o))
+            by_type[str(o)].append(str(s))
+        elif p == RDFS.subClassOf:
+            parents[str(s)].append(str(o))
+            children[str(o)].append(str(s))
+        elif p == RDFS.domain:
+            domains[str(s)].append(str(o))
+            domain_props[str(o)].append(str(s))
+        elif p == RDFS.range:
+            ranges[str(s)].append(str(o))
+            range_props[str(o)].append(str(s))
+
+    idx = memo[graph] = {
+        "labels": labels,
+        "comments": comments,
+        "types_of": dict(types_of),
+        "by_type": dict(by_type),
+        "domains": dict(domains),
+        "ranges": dict(ranges),
+        "domain_props": dict(domain_props),
+        "range_props": dict(range_props),
+        "subclass_parents": dict(parents),
+        "subclass_children": dict(children),
+    }
+    return idx
 
-    for p in graph.subjects(RDF.type, OWL.ObjectProperty):
-        obj_rows.append(_property_row(graph, p))
 
-    for p in graph.subjects(RDF.type, OWL.DatatypeProperty):
-        dt_rows.append(_property_row(graph, p))
+def get_label(idx: dict, uri):
+    """
+    Return rdfs:label or last fragment of IRI. `idx` is build_indexes(graph);
+    IRIs without a label (most foreign ones) cost one dict miss, no probe.
+    """
+    iri = str(uri)
+    return idx["labels"].get(iri) or _fragment(iri)
 
-    df_obj = pd.DataFrame(obj_rows).sort_values("Label") if obj_rows else pd.DataFrame()
-    df_dt = pd.DataFrame(dt_rows).sort_values("Label") if dt_rows else pd.DataFrame()
-    return df_obj.reset_index(drop=True), df_dt.reset_index(drop=True)
 
+PROPERTY_KINDS = [
+    (str(OWL.ObjectProperty), "Object"),
+    (str(OWL.DatatypeProperty), "Datatype"),
+    (str(OWL.AnnotationProperty), "Annotation"),
+    (str(RDF.Property), "Generic"),
+]
 
-def _property_row(graph: Graph, p, kind: str):
-    label = get_label(graph, p)
-    comment = get_comment(graph, p)
-    domains = [get_label(graph, d) for d in graph.objects(p, RDFS.domain)]
-    ranges = [get_label(graph, r) for r in graph.objects(p, RDFS.range)]
-    return {
-        "Label": label,
-        "IRI": str(p),
-        "Kind": kind,
-        "Domain": ", ".join(domains),
-        "Range": ", ".join(ranges),
-        "Comment": comment,
-    }
+
+def _property_kind(types):
+    """Infer a property's kind from its rdf:type IRIs."""
+    for type_iri, kind in PROPERTY_KINDS:
+        if type_iri in types:
+            return kind
+    # Untyped, but used in domain/range
+    return "Unknown"
+
+
+def extract_classes(graph: Graph):
+    """Return DataFrame of classes."""
+    idx = build_indexes(graph)
+    by_type = idx["by_type"]
+    parents = idx["subclass_parents"]
+
+    # owl:Class and rdfs:Class
+    classes = set(by_type.get(str(OWL.Class), ())) | set(by_type.get(str(RDFS.Class), ()))
+    rows = [
+        {
+            "Label": get_label(idx, c),
+            "IRI": c,
+            "SubClassOf": ", ".join(get_label(idx, p) for p in parents.get(c, ())),
+            "Comment": idx["comments"].get(c, ""),
+        }
+        for c in classes
+    ]
+
+    # Sorted once here; callers only see this via _extract_classes_cached
+    df = pd.DataFrame(rows, columns=["Label", "IRI", "SubClassOf", "Comment"])
+    return df.sort_values("Label", ignore_index=True)
 
 
 def extract_properties(graph: Graph) -> pd.DataFrame:
@@ -461,72 +741,728 @@ def extract_properties(graph: Graph) -> pd.DataFrame:
 
     The DataFrame has a 'Kind' column indicating the inferred type.
     """
-    props = set()
-
-    # Explicit types
-    for p in graph.subjects(RDF.type, OWL.ObjectProperty):
-        props.add(p)
-    for p in graph.subjects(RDF.type, OWL.DatatypeProperty):
-        props.add(p)
-    for p in graph.subjects(RDF.type, OWL.AnnotationProperty):
-        props.add(p)
-    for p in graph.subjects(RDF.type, RDF.Property):
-        props.add(p)
-
-    # Also anything with a domain or range
-    for p in graph.subjects(RDFS.domain, None):
-        props.add(p)
-    for p in graph.subjects(RDFS.range, None):
-        props.add(p)
-
-    rows = []
-    for p in props:
-        types = set(graph.objects(p, RDF.type))
-
-        if OWL.ObjectProperty in types:
-            kind = "Object"
-        elif OWL.DatatypeProperty in types:
-            kind = "Datatype"
-        elif OWL.AnnotationProperty in types:
-            kind = "Annotation"
-        elif RDF.Property in types:
-            kind = "Generic"
-        else:
-            # Untyped, but used in domain/range
-            kind = "Unknown"
+    idx = build_indexes(graph)
+    domains = idx["domains"]
+    ranges = idx["ranges"]
+
+    # Explicit types, plus anything with a domain or range
+    props = set(domains) | set(ranges)
+    for type_iri, _ in PROPERTY_KINDS:
+        props.update(idx["by_type"].get(type_iri, ()))
+
+    rows = [
+        {
+            "Label": get_label(idx, p),
+            "IRI": p,
+            "Kind": _property_kind(idx["types_of"].get(p, ())),
+            "Domain": ", ".join(get_label(idx, d) for d in domains.get(p, ())),
+            "Range": ", ".join(get_label(idx, r) for r in ranges.get(p, ())),
+            "Comment": idx["comments"].get(p, ""),
+        }
+        for p in props
+    ]
+
+    # Always return a DataFrame, never None
+    df = pd.DataFrame(
+        rows, columns=["Label", "IRI", "Kind", "Domain", "Range", "Comment"]
+    )
+    return df.sort_values(["Kind", "Label"], ignore_index=True)
 
-        rows.append(_property_row(graph, p, kind=kind))
 
-    if not rows:
-        # Always return a DataFrame, never None
-        return pd.DataFrame(
-            columns=["Label", "IRI", "Kind", "Domain", "Range", "Comment"]
-        )
+# Derived columns on the cached tables that are never displayed:
+#   _search: lowercased "Label<US>IRI" haystack used by the text filter
+#   _frag:   IRI fragment used in selector labels
+HIDDEN_COLUMNS = ["_search", "_frag"]
+
+
+def _with_hidden_columns(df: pd.DataFrame):
+    """Precompute the HIDDEN_COLUMNS of a class/property table in place."""
+    # \x1f (unit separator) keeps a needle from matching across label and IRI
+    df["_search"] = (df["Label"] + "\x1f" + df["IRI"]).str.lower()
+    df["_frag"] = _fragments(df["IRI"])
+    return df
+
+
+def filter_by_text(df: pd.DataFrame, search: str):
+    """Rows whose label or IRI contains `search` (case-insensitive)."""
+    mask = df["_search"].str.contains(search.lower(), regex=False, na=False)
+    return df[mask]
+
+
+def graph_fingerprint(graph: Graph):
+    """
+    Cheap cache identity for a loaded graph: the `_graph_key` set by the
+    loaders (source + content SHA / digest) plus the triple count. Used as
+    the Graph hash for st.cache_data, so a cache hit never pickles the graph.
+    """
+    return (graph._graph_key, len(graph))
+
+
+GRAPH_HASH_FUNCS = {Graph: graph_fingerprint}
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _extract_classes_cached(graph: Graph):
+    """extract_classes, cached per loaded ontology."""
+    return _with_hidden_columns(extract_classes(graph))
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _extract_properties_cached(graph: Graph):
+    """extract_properties, cached per loaded ontology."""
+    return _with_hidden_columns(extract_properties(graph))
+
+
+def _sorted_options(display: pd.Series, iris: pd.Series):
+    """Display labels in sorted order plus a display -> IRI map."""
+    df = pd.DataFrame({"display": display, "IRI": iris})
+    df = df.sort_values("display", kind="stable")
+    display_labels = df["display"].tolist()
+    return display_labels, dict(zip(display_labels, df["IRI"]))
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _class_selector_data(graph: Graph):
+    """
+    Sorted display labels and display -> IRI map for the focus-class
+    selector, built once per loaded ontology instead of on every rerun.
+    """
+    df_classes = _extract_classes_cached(graph)
+    # "Label (fragment)", or the bare IRI for unlabelled classes
+    labels = df_classes["Label"].fillna("")
+    display = (
+        (labels + " (" + df_classes["_frag"] + ")")
+        .where(labels != "", df_classes["IRI"])
+    )
+    return _sorted_options(display, df_classes["IRI"])
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _prop_selector_data(graph: Graph):
+    """
+    Sorted display labels, display -> IRI map and IRI -> row-dict map for the
+    property-centric selector, built once per loaded ontology instead of on
+    every rerun.
+    """
+    df_props = _extract_properties_cached(graph)
+    # "[Kind] Label (fragment)", or "[Kind] IRI" for unlabelled properties
+    kinds = "[" + df_props["Kind"] + "] "
+    labels = df_props["Label"].fillna("")
+    display = (
+        (kinds + labels + " (" + df_props["_frag"] + ")")
+        .where(labels != "", kinds + df_props["IRI"])
+    )
+    display_labels, iri_lookup = _sorted_options(display, df_props["IRI"])
+    # One row per property IRI (extract_properties builds them from a set)
+    prop_by_iri = (
+        df_props[["IRI", "Label", "Kind", "Domain", "Range", "Comment"]]
+        .set_index("IRI")
+        .to_dict(orient="index")
+    )
+    return display_labels, iri_lookup, prop_by_iri
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _property_graph_cached(graph: Graph, prop_iri: str) -> MiniGraph:
+    """build_property_graph, cached per (loaded ontology, property)."""
+    return build_property_graph(graph, URIRef(prop_iri))
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _property_graph_json(graph: Graph, prop_iri: str) -> str:
+    """JSON download payload for a property graph, serialized once per property."""
+    G = _property_graph_cached(graph, prop_iri)
+    return graph_to_json_text(G)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _property_graph_html(graph: Graph, prop_iri: str, height: str = "600px") -> str:
+    """pyvis HTML for a property graph, rendered once per property."""
+    return render_graph_pyvis(_property_graph_cached(graph, prop_iri), height=height)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _class_graph_cached(graph: Graph, focus_iri: str, max_depth: int) -> MiniGraph:
+    """build_class_subclass_graph, cached per (loaded ontology, focus, depth)."""
+    return build_class_subclass_graph(graph, URIRef(focus_iri), max_depth=max_depth)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _class_graph_json(graph: Graph, focus_iri: str, max_depth: int) -> str:
+    """JSON download payload for a class neighbourhood, serialized once."""
+    G = _class_graph_cached(graph, focus_iri, max_depth)
+    return graph_to_json_text(G)
+
 
-    df = pd.DataFrame(rows).sort_values(["Kind", "Label"])
-    return df.reset_index(drop=True)
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def _class_graph_html(graph: Graph, focus_iri: str, max_depth: int, height: str = "600px") -> str:
+    """pyvis HTML for a class neighbourhood, rendered once per focus/depth."""
+    G = _class_graph_cached(graph, focus_iri, max_depth)
+    return render_graph_pyvis(G, height=height)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=GRAPH_HASH_FUNCS)
+def overview_stats(graph: Graph):
+    """
+    Return (triples, classes, object properties, datatype properties).
+    The triple count is the store's own len(); the rest are sizes of the
+    rdf:type buckets that build_indexes already holds.
+    """
+    by_type = build_indexes(graph)["by_type"]
+
+    def count(*types):
+        return len({iri for t in types for iri in by_type.get(str(t), ())})
+
+    return (
+        len(graph),
+        count(OWL.Class, RDFS.Class),
+        count(OWL.ObjectProperty),
+        count(OWL.DatatypeProperty),
+    )
+
+
+# Preset queries offered in the SPARQL tab
+EXAMPLE_QUERIES = {
+    "List all classes (label + IRI)": """
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX owl:  <http://www.w3.org/2002/07/owl#>
+
+        SELECT ?class ?label
+        WHERE {
+          ?class a owl:Class .
+          OPTIONAL { ?class rdfs:label ?label . }
+        }
+        ORDER BY ?label
+    """,
+    "List properties with domain & range": """
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX rdf:  <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX owl:  <http://www.w3.org/2002/07/owl#>
+
+        SELECT ?prop ?kind ?label ?domain ?range
+        WHERE {
+          ?prop a ?t .
+          FILTER(?t IN (owl:ObjectProperty, owl:DatatypeProperty, rdf:Property, owl:AnnotationProperty))
+
+          BIND(
+            IF(?t = owl:ObjectProperty, "Object",
+              IF(?t = owl:DatatypeProperty, "Datatype",
+                IF(?t = owl:AnnotationProperty, "Annotation", "Generic")
+              )
+            ) AS ?kind
+          )
+
+          OPTIONAL { ?prop rdfs:label ?label . }
+          OPTIONAL { ?prop rdfs:domain ?domain . }
+          OPTIONAL { ?prop rdfs:range ?range . }
+        }
+        ORDER BY ?kind ?label
+    """,
+    "DFO: all EscapementMethod subclasses": """
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX owl:  <http://www.w3.org/2002/07/owl#>
+        PREFIX dfo:  <https://w3id.org/dfo/salmon#>
+
+        SELECT ?method ?label
+        WHERE {
+          ?method rdfs:subClassOf* dfo:EscapementMethod .
+          OPTIONAL { ?method rdfs:label ?label . }
+        }
+        ORDER BY ?label
+    """,
+    "DFO: MU → CU → Stock chain": """
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX dfo:  <https://w3id.org/dfo/salmon#>
+
+        SELECT ?mu ?muLabel ?cu ?cuLabel ?stock ?stockLabel
+        WHERE {
+          ?mu a dfo:ManagementUnit .
+          OPTIONAL { ?mu rdfs:label ?muLabel . }
+
+          ?cu dfo:isMemberOfMU ?mu .
+          OPTIONAL { ?cu rdfs:label ?cuLabel . }
+
+          ?stock dfo:isMemberOfCU ?cu .
+          OPTIONAL { ?stock rdfs:label ?stockLabel . }
+        }
+        ORDER BY ?muLabel ?cuLabel ?stockLabel
+    """,
+}
+# Dedent/strip once so the text area, the prepared-query map and the result
+# cache all see the same canonical string
+EXAMPLE_QUERIES = {
+    name: textwrap.dedent(query).strip() for name, query in EXAMPLE_QUERIES.items()
+}
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def prepare_sparql(query: str, namespaces: tuple = ()):
+    """
+    Parse and translate a SPARQL query once; reruns reuse the algebra.
+
+    `namespaces` are the graph's (prefix, IRI) bindings, so queries may use
+    the ontology's prefixes without declaring them, as with graph.query().
+    """
+    return prepareQuery(query, initNs=dict(namespaces))
+
+
+@st.cache_resource(show_spinner=False)
+def prepared_examples():
+    """Compiled presets, kept apart from prepare_sparql so user queries never evict them."""
+    return {query: prepareQuery(query) for query in EXAMPLE_QUERIES.values()}
 
 
 def run_sparql(graph: Graph, query: str):
     """Run SPARQL and return a DataFrame."""
     try:
+        if GRAPH_STORE == "default":
+            # Oxigraph only runs query strings natively (a prepared query
+            # falls back to rdflib's engine), so only precompile for rdflib
+            query = prepared_examples().get(query) or prepare_sparql(
+                query, tuple(graph.namespaces())
+            )
         res = graph.query(query)
+
+        # Transpose the rows at C speed, then stringify one column at a time
+        # with a comprehension, so pandas builds each column directly
+        cols = [str(c) for c in res.vars]
+        rows = list(res)
+        columns = zip(*rows) if rows else [()] * len(cols)
+        data = {
+            c: ["" if v is None else str(v) for v in column]
+            for c, column in zip(cols, columns)
+        }
+        df = pd.DataFrame(data, columns=cols)
     except Exception as e:
+        # rdflib evaluates lazily, so errors can surface while iterating
         return None, str(e)
 
-    rows = []
-    cols = res.vars
-    for row in res:
-        rows.append([str(row[c]) if row[c] is not None else "" for c in cols])
-
-    df = pd.DataFrame(rows, columns=[str(c) for c in cols])
     return df, None
 
 
+# Finished SPARQL jobs kept per (ontology, query text) as a result cache,
+# bounded by entry count and by the total rows held across all results
+SPARQL_CACHE_SIZE = 128
+SPARQL_CACHE_MAX_ROWS = 1_000_000
+
+
+@st.cache_resource(show_spinner=False)
+def _sparql_executor():
+    """Worker threads for SPARQL queries, shared by all sessions."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="sparql")
+
+
+@st.cache_resource(show_spinner=False)
+def _sparql_jobs():
+    """(graph fingerprint, query text) -> Future of run_sparql, oldest first."""
+    return OrderedDict(), threading.Lock()
+
+
+def submit_sparql(graph: Graph, query: str):
+    """
+    Run `query` on a worker thread and return its Future. A running or
+    finished job for the same (ontology, query) is reused, so reruns and
+    repeated clicks never execute an identical query twice.
+    """
+    jobs, lock = _sparql_jobs()
+    key = (graph_fingerprint(graph), query)
+    with lock:
+        job = jobs.get(key)
+        is_new = job is None or job.cancelled()
+        if is_new:
+            job = jobs[key] = _sparql_executor().submit(run_sparql, graph, query)
+            while len(jobs) > SPARQL_CACHE_SIZE:
+                jobs.popitem(last=False)
+        else:
+            jobs.move_to_end(key)
+    if is_new:
+        # Added outside the lock: a job that is already done runs the
+        # callback right here, and the callback takes the lock itself
+        job.add_done_callback(functools.partial(_settle_sparql_job, jobs, lock, key))
+    return job
+
+
+def _settle_sparql_job(jobs, lock, key, job):
+    """
+    Done-callback for SPARQL jobs: failed and cancelled jobs leave the cache
+    (so a fixed ontology or transient error is retried), and the oldest
+    finished results are evicted once the cached rows exceed
+    SPARQL_CACHE_MAX_ROWS. The newest result for `key` is always kept.
+    """
+    with lock:
+        # exception() first: result() would re-raise inside the callback
+        failed = (
+            job.cancelled()
+            or job.exception() is not None
+            or job.result()[1] is not None
+        )
+        if failed:
+            if jobs.get(key) is job:
+                del jobs[key]
+            return
+
+        total_rows = 0
+        for other_key in reversed(list(jobs)):
+            other = jobs[other_key]
+            if not other.done() or other.cancelled() or other.exception():
+                continue
+            df, _ = other.result()
+            total_rows += 0 if df is None else len(df)
+            if total_rows > SPARQL_CACHE_MAX_ROWS and other_key != key:
+                del jobs[other_key]
+
+
+def cancel_sparql(graph: Graph, query: str) -> bool:
+    """
+    Forget the SPARQL job for (ontology, query). A queued job is cancelled
+    (returns True); a running one cannot be interrupted inside rdflib, so it
+    finishes on its worker and its result is dropped (returns False).
+    """
+    jobs, lock = _sparql_jobs()
+    with lock:
+        job = jobs.pop((graph_fingerprint(graph), query), None)
+    return job is not None and job.cancel()
+
+
 # -------------------------------------------------------------------
 # Streamlit UI
 # -------------------------------------------------------------------
 
+# Rows per page in the Classes / Properties tables
+TABLE_PAGE_SIZE = 200
+
+
+def paginate(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    """
+    Return one TABLE_PAGE_SIZE slice of `df`, picked with a page number input
+    (keyed `{key}_page`) that only appears when there is more than one page.
+    """
+    num_pages = max(1, -(-len(df) // TABLE_PAGE_SIZE))
+    if num_pages > 1:
+        page_key = f"{key}_page"
+        if st.session_state.get(page_key, 1) > num_pages:
+            # Filter narrowed the table below the remembered page
+            st.session_state[page_key] = 1
+        page = st.number_input(
+            f"Page (of {num_pages})",
+            min_value=1,
+            max_value=num_pages,
+            key=page_key,
+        )
+        start = (page - 1) * TABLE_PAGE_SIZE
+        df = df.iloc[start:start + TABLE_PAGE_SIZE]
+        # Header clicks sort in the browser, which only holds this page
+        st.caption(
+            f"Rows {start + 1}–{start + len(df)}. "
+            "Clicking a column header sorts this page only."
+        )
+    return df
+
+
+def render_table(df: pd.DataFrame, key: str):
+    """
+    Show a class/property table without its Comment column (comments can be
+    long paragraphs, and the whole frame is re-sent on every rerun). The
+    comment of the selected row is shown underneath instead.
+    """
+    # Only one page of rows is sent to the browser per rerun
+    df = paginate(df, key)
+    # One widget per page, so a row selected on one page is not applied to
+    # whatever row sits at the same position on the next
+    page = st.session_state.get(f"{key}_page", 1)
+
+    event = st.dataframe(
+        df.drop(columns=HIDDEN_COLUMNS + ["Comment"]),
+        width="stretch",
+        hide_index=True,
+        height=600,
+        key=f"{key}_{page}",
+        on_select="rerun",
+        selection_mode="single-row",
+    )
+
+    selected = [i for i in event.selection.rows if i < len(df)]
+    if selected:
+        row = df.iloc[selected[0]]
+        st.markdown(f"**Comment / definition – {row['Label']}:**")
+        st.write(row["Comment"] or "_No rdfs:comment._")
+    else:
+        st.caption("Select a row to show its comment / definition.")
+
+
+@st.fragment
+def render_class_mode(g: Graph):
+    """
+    Class hierarchy graph view. A fragment, so changing the focus class, the
+    depth or the inspected node reruns only this block instead of the whole
+    page.
+    """
+    display_labels, iri_lookup = _class_selector_data(g)
+
+    selected_focus_display = st.selectbox(
+        "Select focus class",
+        options=display_labels,
+        index=0,
+    )
+    focus_iri = iri_lookup[selected_focus_display]
+
+    max_depth = st.slider(
+        "Neighbourhood depth (how far up/down to explore)",
+        min_value=1,
+        max_value=4,
+        value=2,
+    )
+
+    st.write(f"**Focus IRI:** `{focus_iri}`")
+
+    with st.spinner("Building class hierarchy graph…"):
+        G = _class_graph_cached(g, focus_iri, max_depth)
+
+    # Offer download of this neighbourhood as JSON; the payload
+    # is only serialized on the first visit to this focus/depth
+    graph_json = _class_graph_json(g, focus_iri, max_depth)
+    st.download_button(
+        "Download neighbourhood as JSON",
+        data=graph_json,
+        file_name="class_neighbourhood.json",
+        mime="application/json",
+    )
+
+    if len(G.nodes) == 0:
+        st.info("No neighbourhood found for this class.")
+    else:
+        col_graph, col_details = st.columns([2, 1])
+
+        with col_graph:
+            st.markdown("#### Class hierarchy graph")
+            html = _class_graph_html(g, focus_iri, max_depth, height="600px")
+            components.html(html, height=600, scrolling=True)
+
+            st.markdown(
+                """
+                **Legend**  
+                - 🟡 Focus class  
+                - 🔵 Ancestors  
+                - 🟢 Descendants  
+                - ⚪ Other
+                """
+            )
+
+        with col_details:
+            st.markdown("#### Node details")
+
+            node_options = []
+            for node, data in G.nodes.items():
+                label = data.get("label", "")
+                frag = _fragment(node)
+                display = f"{label} ({frag})" if label else node
+                node_options.append((display, node))
+
+            node_options_sorted = sorted(node_options, key=lambda x: x[0])
+            node_display_labels = [d for d, _ in node_options_sorted]
+            node_lookup = {d: iri for d, iri in node_options_sorted}
+
+            default_node_index = 0
+            for i, (display, iri) in enumerate(node_options_sorted):
+                if iri == focus_iri:
+                    default_node_index = i
+                    break
+
+            selected_node_display = st.selectbox(
+                "Select node to inspect",
+                options=node_display_labels,
+                index=default_node_index,
+            )
+            selected_node_iri = node_lookup[selected_node_display]
+
+            details = describe_node(g, selected_node_iri)
+            role = G.nodes[selected_node_iri].get("role", "other")
+
+            st.write(f"**Label:** {details['label']}")
+            st.write(f"**IRI:** `{details['iri']}`")
+            st.write(f"**Role in graph:** `{role}`")
+
+            if details["comment"]:
+                st.markdown("**Comment / definition:**")
+                st.write(details["comment"])
+
+            # One markdown element per list instead of one
+            # st.write (and one front-end message) per item
+            sections = [
+                ("rdf:type", [f"`{t}`" for t in details["types"]]),
+                ("Parents (rdfs:subClassOf)", details["parents"]),
+                ("Children (rdfs:subClassOf)", details["children"]),
+                ("Properties where this is the domain", details["props_as_domain"]),
+                ("Properties where this is the range", details["props_as_range"]),
+            ]
+            for heading, items in sections:
+                if items:
+                    st.markdown(
+                        f"**{heading}:**\n\n"
+                        + "\n".join(f"- {item}" for item in items)
+                    )
+
+
+@st.fragment
+def render_property_mode(g: Graph):
+    """
+    Property-centric graph view. A fragment, so picking another property
+    reruns only this block instead of the whole page.
+    """
+    st.markdown("Visualize a property with its domain and range classes.")
+
+    display_labels, iri_lookup, prop_by_iri = _prop_selector_data(g)
+
+    selected_prop_display = st.selectbox(
+        "Select property",
+        options=display_labels,
+        index=0,
+    )
+    prop_iri = iri_lookup[selected_prop_display]
+
+    st.write(f"**Property IRI:** `{prop_iri}`")
+
+    with st.spinner("Building property-centric graph…"):
+        G = _property_graph_cached(g, prop_iri)
+
+    graph_json = _property_graph_json(g, prop_iri)
+    st.download_button(
+        "Download property graph as JSON",
+        data=graph_json,
+        file_name="property_graph.json",
+        mime="application/json",
+    )
+
+    if len(G.nodes) == 0:
+        st.info("No domain or range classes found for this property.")
+    else:
+        col_graph, col_details = st.columns([2, 1])
+
+        with col_graph:
+            st.markdown("#### Property-centric graph")
+            html = _property_graph_html(g, prop_iri, height="600px")
+            components.html(html, height=600, scrolling=True)
+
+            st.markdown(
+                """
+                **Legend**  
+                - 🟧 Property  
+                - 🟪 Domain class  
+                - 🟦 Range class  
+                """
+            )
+
+        with col_details:
+            st.markdown("#### Property details")
+
+            # Basic details from df_props, by IRI (no boolean mask scan)
+            prop_row = prop_by_iri[prop_iri]
+
+            st.write(f"**Label:** {prop_row['Label']}")
+            st.write(f"**Kind:** {prop_row['Kind']}")
+            st.write(f"**Domain:** {prop_row['Domain']}")
+            st.write(f"**Range:** {prop_row['Range']}")
+
+            if prop_row["Comment"]:
+                st.markdown("**Comment / definition:**")
+                st.write(prop_row["Comment"])
+
+
+@st.fragment
+def render_sparql_tab(g: Graph):
+    """
+    SPARQL playground. A fragment, so editing, running and paging queries
+    reruns only this tab instead of the whole page.
+    """
+    st.subheader("SPARQL playground")
+    st.caption(
+        "Engine: Oxigraph (native)" if GRAPH_STORE == "Oxigraph"
+        else "Engine: rdflib (pure Python)"
+    )
+
+    selected_example = st.selectbox(
+        "Example query",
+        options=["(None)"] + list(EXAMPLE_QUERIES.keys()),
+    )
+
+    if selected_example != "(None)":
+        query_default = EXAMPLE_QUERIES[selected_example]
+    else:
+        query_default = "SELECT * WHERE { ?s ?p ?o } LIMIT 25"
+
+    query_text = st.text_area(
+        "SPARQL query",
+        value=query_default,
+        height=220,
+    )
+
+    if st.button("Run query"):
+        # Remember the run so paging through its results (a rerun without
+        # the button) still shows them; the rows come from the cache
+        st.session_state["sparql_last_run"] = (
+            graph_fingerprint(g),
+            query_text.strip(),
+        )
+        st.session_state["sparql_results_page"] = 1
+        st.session_state["sparql_error"] = None  # (graph fingerprint, message)
+
+    last_run = st.session_state.get("sparql_last_run")
+    if last_run is not None and last_run[0] == graph_fingerprint(g):
+        job = submit_sparql(g, last_run[1])
+
+        if not job.done() and st.button(
+            "Cancel query",
+            key="sparql_cancel",
+            help="A query that has already started cannot be interrupted: it keeps "
+                 "running in the background until it finishes, and its result is discarded.",
+        ):
+            st.session_state["sparql_last_run"] = None
+            if cancel_sparql(g, last_run[1]):
+                st.info("Query cancelled before it started.")
+            else:
+                st.info(
+                    "Stopped waiting for the query. It was already running and will "
+                    "finish in the background (its result is discarded)."
+                )
+        else:
+            if not job.done():
+                # Wait in short slices rather than blocking inside g.query:
+                # each status update lets Streamlit stop this run, so Cancel
+                # and every other widget stay responsive meanwhile
+                status = st.empty()
+                started = time.monotonic()
+                while not wait([job], timeout=0.25).done:
+                    status.caption(
+                        f"Running SPARQL query… {time.monotonic() - started:.0f}s"
+                    )
+                status.empty()
+
+            if job.cancelled():
+                # Another session cancelled the shared job while it was queued
+                st.session_state["sparql_last_run"] = None
+                st.info("Query was cancelled before it started.")
+                return
+
+            df_res, err = job.result()
+            if err:
+                # Failed runs are not cached, so keep the message rather than
+                # the run (which would re-execute the query on every rerun)
+                st.session_state["sparql_last_run"] = None
+                st.session_state["sparql_error"] = (last_run[0], err)
+                st.error(f"SPARQL error: {err}")
+            elif df_res is not None and not df_res.empty:
+                st.success(f"Query returned {len(df_res)} rows.")
+                if last_run[1] != query_text.strip():
+                    st.caption("Showing results of the last query run.")
+                st.dataframe(paginate(df_res, "sparql_results"), width='stretch')
+            else:
+                st.info("Query returned no results.")
+    else:
+        last_error = st.session_state.get("sparql_error")
+        if last_error is not None and last_error[0] == graph_fingerprint(g):
+            st.error(f"SPARQL error: {last_error[1]}")
+
+
 def main():
     st.set_page_config(
         page_title="DFO Salmon Ontology Playground",
@@ -550,22 +1486,47 @@ def main():
 
         if st.sidebar.button("Reload TTL file list (clear cache)"):
             list_ttl_files.clear()
-            load_graph_from_github.clear()
+            load_graphs_from_github.clear()
+            _extract_classes_cached.clear()
+            _extract_properties_cached.clear()
+            overview_stats.clear()
+            _class_selector_data.clear()
+            _prop_selector_data.clear()
+            _property_graph_cached.clear()
+            _property_graph_json.clear()
+            _property_graph_html.clear()
+            _class_graph_cached.clear()
+            _class_graph_json.clear()
+            _class_graph_html.clear()
+            _sparql_jobs.clear()
+            for key in [k for k in st.session_state if k.startswith("ttl_map:")]:
+                del st.session_state[key]
             st.sidebar.success("Cache cleared – TTL file list will refresh.")
 
-        ttl_files = list_ttl_files(branch=branch)
+        # label -> path map (and option list) built once per branch per session
+        ttl_map_key = f"ttl_map:{branch}"
+        if ttl_map_key not in st.session_state:
+            ttl_files = list_ttl_files(branch=branch)
 
-        if not ttl_files:
-            st.error("No .ttl files found in the /ontology directory of the repo. Check branch name or repo paths.")
-            st.stop()
+            if not ttl_files:
+                st.error("No .ttl files found in the repo root or /ontology directory. Check branch name or TTL_SEARCH_PATHS.")
+                st.stop()
 
-        ttl_label_to_path = {
-            f"{f['name']} ({f['path']})": f["path"] for f in ttl_files
-        }
+            ttl_label_to_path = {
+                f"{f['name']} ({f['path']})": f["path"] for f in ttl_files
+            }
+
+            st.session_state[ttl_map_key] = (
+                ttl_label_to_path,
+                list(ttl_label_to_path.keys()),
+                {f["path"]: f["sha"] for f in ttl_files},
+            )
+
+        ttl_label_to_path, ttl_options, ttl_path_to_sha = st.session_state[ttl_map_key]
 
         selected_label = st.sidebar.selectbox(
-            "Ontology file (from GitHub /ontology/)",
-            options=list(ttl_label_to_path.keys()),
+            "Ontology file (from GitHub)",
+            options=ttl_options,
             index=0,
         )
         selected_path = ttl_label_to_path[selected_label]
@@ -573,7 +1534,9 @@ def main():
         st.sidebar.write(f"**Selected file:** `{selected_path}`")
 
         with st.spinner(f"Loading ontology from GitHub: {selected_path}…"):
-            g = load_graph_from_github(path=selected_path, branch=branch)
+            g = load_graph_from_github(
+                path=selected_path, branch=branch, sha=ttl_path_to_sha[selected_path]
+            )
 
         st.success("Ontology loaded from GitHub.")
 
@@ -610,8 +1573,10 @@ def main():
         st.success(f"Ontology loaded from upload: `{uploaded.name}`")
 
     # from here on, the rest of your code uses `g` as before
-    # After g is successfully loaded (GitHub or upload), compute classes once
-    df_classes_all = extract_classes(g)
+    # After g is successfully loaded (GitHub or upload), compute classes and
+    # properties once; every tab below shares these frames
+    df_classes_all = _extract_classes_cached(g)
+    df_props_all = _extract_properties_cached(g)
 
     # # Initialize a global focus class in session state (if not set yet)
     # if "focus_class_iri" not in st.session_state:
@@ -632,12 +1597,7 @@ def main():
         st.subheader("Ontology overview")
 
         # Basic stats
-        num_triples = len(g)
-        num_classes = len(
-            set(list(g.subjects(RDF.type, OWL.Class)) + list(g.subjects(RDF.type, RDFS.Class)))
-        )
-        num_obj_props = len(list(g.subjects(RDF.type, OWL.ObjectProperty)))
-        num_dt_props = len(list(g.subjects(RDF.type, OWL.DatatypeProperty)))
+        num_triples, num_classes, num_obj_props, num_dt_props = overview_stats(g)
 
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Triples", num_triples)
@@ -694,29 +1654,23 @@ def main():
         else:
             st.markdown("Use the filter below to search by label or IRI.")
 
-            search = st.text_input(
-                "Filter by label or IRI (contains):",
-                value="",
-                placeholder="e.g. EscapementMethod, Stock, CU…",
-            )
+            # A form only reruns the script on submit (button or Enter)
+            with st.form("classes_search", clear_on_submit=False, border=False):
+                search = st.text_input(
+                    "Filter by label or IRI (contains):",
+                    value="",
+                    placeholder="e.g. EscapementMethod, Stock, CU…",
+                )
+                st.form_submit_button("Filter")
 
             if search:
-                mask = (
-                    df_classes["Label"].str.contains(search, case=False, na=False)
-                    | df_classes["IRI"].str.contains(search, case=False, na=False)
-                )
-                df_filtered = df_classes[mask]
+                df_filtered = filter_by_text(df_classes, search)
             else:
                 df_filtered = df_classes
 
             st.caption(f"Showing {len(df_filtered)} of {len(df_classes)} classes.")
 
-            st.dataframe(
-                df_filtered,
-                width="stretch",
-                hide_index=True,
-                height=600,
-            )
+            render_table(df_filtered, key="classes_table")
 
     # ----------------------------------------------------------------
     # Properties
@@ -724,7 +1678,7 @@ def main():
     with tab_props:
         st.subheader("Properties")
 
-        df_props = extract_properties(g)
+        df_props = df_props_all
 
         if df_props.empty:
             st.info(
@@ -735,33 +1689,28 @@ def main():
             )
         else:
             kinds = sorted(df_props["Kind"].unique())
-            kind_filter = st.multiselect(
-                "Filter by property kind",
-                options=kinds,
-                default=kinds,
-            )
 
-            df_filtered = df_props[df_props["Kind"].isin(kind_filter)]
+            # Kind + text filters are applied together on submit, so ticking
+            # several kinds or typing does not rerun the script each time
+            with st.form("props_search_form", clear_on_submit=False, border=False):
+                kind_filter = st.multiselect(
+                    "Filter by property kind",
+                    options=kinds,
+                    default=kinds,
+                )
+                search = st.text_input(
+                    "Filter properties by label or IRI (contains):",
+                    value="",
+                    key="props_search",
+                )
+                st.form_submit_button("Filter")
 
-            search = st.text_input(
-                "Filter properties by label or IRI (contains):",
-                value="",
-                key="props_search",
-            )
+            df_filtered = df_props[df_props["Kind"].isin(kind_filter)]
             if search:
-                mask = (
-                    df_filtered["Label"].str.contains(search, case=False, na=False)
-                    | df_filtered["IRI"].str.contains(search, case=False, na=False)
-                )
-                df_filtered = df_filtered[mask]
+                df_filtered = filter_by_text(df_filtered, search)
 
             st.caption(f"Showing {len(df_filtered)} of {len(df_props)} properties.")
-            st.dataframe(
-                df_filtered,
-                width="stretch",
-                hide_index=True,
-                height=600,
-            )
+            render_table(df_filtered, key="props_table")
 
     # ----------------------------------------------------------------
     # Graph
@@ -770,7 +1719,7 @@ def main():
         st.subheader("Graph views")
 
         df_classes = df_classes_all
-        df_props = extract_properties(g)
+        df_props = df_props_all
 
         if df_classes.empty and df_props.empty:
             st.info("No classes or properties found to build graphs.")
@@ -789,129 +1738,7 @@ def main():
                 if df_classes.empty:
                     st.info("No classes found to build a class hierarchy graph.")
                 else:
-                    focus_options = []
-                    for _, row in df_classes.iterrows():
-                        label = row["Label"] or ""
-                        iri = row["IRI"]
-                        frag = iri.split("#")[-1].split("/")[-1]
-                        display = f"{label} ({frag})" if label else iri
-                        focus_options.append((display, iri))
-
-                    focus_options_sorted = sorted(focus_options, key=lambda x: x[0])
-                    display_labels = [d for d, _ in focus_options_sorted]
-                    iri_lookup = {d: iri for d, iri in focus_options_sorted}
-
-                    selected_focus_display = st.selectbox(
-                        "Select focus class",
-                        options=display_labels,
-                        index=0,
-                    )
-                    focus_iri = iri_lookup[selected_focus_display]
-                    focus_uri = URIRef(focus_iri)
-
-                    max_depth = st.slider(
-                        "Neighbourhood depth (how far up/down to explore)",
-                        min_value=1,
-                        max_value=4,
-                        value=2,
-                    )
-
-                    st.write(f"**Focus IRI:** `{focus_iri}`")
-
-                    with st.spinner("Building class hierarchy graph…"):
-                        G = build_class_subclass_graph(g, focus_uri, max_depth=max_depth)
-
-                    # Offer download of this neighbourhood as JSON
-                    graph_json = json.dumps(graph_to_json_dict(G), indent=2)
-                    st.download_button(
-                        "Download neighbourhood as JSON",
-                        data=graph_json,
-                        file_name="class_neighbourhood.json",
-                        mime="application/json",
-                    )
-
-                    if len(G.nodes) == 0:
-                        st.info("No neighbourhood found for this class.")
-                    else:
-                        col_graph, col_details = st.columns([2, 1])
-
-                        with col_graph:
-                            st.markdown("#### Class hierarchy graph")
-                            html = render_graph_pyvis(G, height="600px")
-                            components.html(html, height=600, scrolling=True)
-
-                            st.markdown(
-                                """
-                                **Legend**  
-                                - 🟡 Focus class  
-                                - 🔵 Ancestors  
-                                - 🟢 Descendants  
-                                - ⚪ Other
-                                """
-                            )
-
-                        with col_details:
-                            st.markdown("#### Node details")
-
-                            node_options = []
-                            for node, data in G.nodes(data=True):
-                                label = data.get("label", "")
-                                frag = node.split("#")[-1].split("/")[-1]
-                                display = f"{label} ({frag})" if label else node
-                                node_options.append((display, node))
-
-                            node_options_sorted = sorted(node_options, key=lambda x: x[0])
-                            node_display_labels = [d for d, _ in node_options_sorted]
-                            node_lookup = {d: iri for d, iri in node_options_sorted}
-
-                            default_node_index = 0
-                            for i, (display, iri) in enumerate(node_options_sorted):
-                                if iri == focus_iri:
-                                    default_node_index = i
-                                    break
-
-                            selected_node_display = st.selectbox(
-                                "Select node to inspect",
-                                options=node_display_labels,
-                                index=default_node_index,
-                            )
-                            selected_node_iri = node_lookup[selected_node_display]
-
-                            details = describe_node(g, selected_node_iri)
-                            role = G.nodes[selected_node_iri].get("role", "other")
-
-                            st.write(f"**Label:** {details['label']}")
-                            st.write(f"**IRI:** `{details['iri']}`")
-                            st.write(f"**Role in graph:** `{role}`")
-
-                            if details["comment"]:
-                                st.markdown("**Comment / definition:**")
-                                st.write(details["comment"])
-
-                            if details["types"]:
-                                st.markdown("**rdf:type:**")
-                                for t in details["types"]:
-                                    st.write(f"- `{t}`")
-
-                            if details["parents"]:
-                                st.markdown("**Parents (rdfs:subClassOf):**")
-                                for p in details["parents"]:
-                                    st.write(f"- {p}")
-
-                            if details["children"]:
-                                st.markdown("**Children (rdfs:subClassOf):**")
-                                for c in details["children"]:
-                                    st.write(f"- {c}")
-
-                            if details["props_as_domain"]:
-                                st.markdown("**Properties where this is the domain:**")
-                                for p in details["props_as_domain"]:
-                                    st.write(f"- {p}")
-
-                            if details["props_as_range"]:
-                                st.markdown("**Properties where this is the range:**")
-                                for p in details["props_as_range"]:
-                                    st.write(f"- {p}")
+                    render_class_mode(g)
 
             # -------------------------------
             # Mode 2: Property-centric
@@ -923,178 +1750,14 @@ def main():
                         "(try another ontology or ensure properties have domain/range/type)."
                     )
                 else:
-                    st.markdown("Visualize a property with its domain and range classes.")
-
-                    prop_options = []
-                    for _, row in df_props.iterrows():
-                        label = row["Label"] or ""
-                        iri = row["IRI"]
-                        frag = iri.split("#")[-1].split("/")[-1]
-                        kind = row["Kind"]
-                        display = f"[{kind}] {label} ({frag})" if label else f"[{kind}] {iri}"
-                        prop_options.append((display, iri))
-
-                    prop_options_sorted = sorted(prop_options, key=lambda x: x[0])
-                    display_labels = [d for d, _ in prop_options_sorted]
-                    iri_lookup = {d: iri for d, iri in prop_options_sorted}
-
-                    selected_prop_display = st.selectbox(
-                        "Select property",
-                        options=display_labels,
-                        index=0,
-                    )
-                    prop_iri = iri_lookup[selected_prop_display]
-                    prop_uri = URIRef(prop_iri)
-
-                    st.write(f"**Property IRI:** `{prop_iri}`")
-
-                    with st.spinner("Building property-centric graph…"):
-                        G = build_property_graph(g, prop_uri)
-                    
-                    graph_json = json.dumps(graph_to_json_dict(G), indent=2)
-                    st.download_button(
-                        "Download property graph as JSON",
-                        data=graph_json,
-                        file_name="property_graph.json",
-                        mime="application/json",
-                    )
-
-                    if len(G.nodes) == 0:
-                        st.info("No domain or range classes found for this property.")
-                    else:
-                        col_graph, col_details = st.columns([2, 1])
-
-                        with col_graph:
-                            st.markdown("#### Property-centric graph")
-                            html = render_graph_pyvis(G, height="600px")
-                            components.html(html, height=600, scrolling=True)
-
-                            st.markdown(
-                                """
-                                **Legend**  
-                                - 🟧 Property  
-                                - 🟪 Domain class  
-                                - 🟦 Range class  
-                                """
-                            )
-
-                        with col_details:
-                            st.markdown("#### Property details")
-
-                            # Basic details from df_props
-                            prop_row = df_props[df_props["IRI"] == prop_iri].iloc[0]
-
-                            st.write(f"**Label:** {prop_row['Label']}")
-                            st.write(f"**Kind:** {prop_row['Kind']}")
-                            st.write(f"**Domain:** {prop_row['Domain']}")
-                            st.write(f"**Range:** {prop_row['Range']}")
-
-                            if prop_row["Comment"]:
-                                st.markdown("**Comment / definition:**")
-                                st.write(prop_row["Comment"])
+                    render_property_mode(g)
 
 
     # ----------------------------------------------------------------
     # SPARQL
     # ----------------------------------------------------------------
     with tab_sparql:
-        st.subheader("SPARQL playground")
-
-        example_queries = {
-            "List all classes (label + IRI)": """
-                PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                PREFIX owl:  <http://www.w3.org/2002/07/owl#>
-
-                SELECT ?class ?label
-                WHERE {
-                  ?class a owl:Class .
-                  OPTIONAL { ?class rdfs:label ?label . }
-                }
-                ORDER BY ?label
-            """,
-            "List properties with domain & range": """
-                PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                PREFIX rdf:  <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-                PREFIX owl:  <http://www.w3.org/2002/07/owl#>
-
-                SELECT ?prop ?kind ?label ?domain ?range
-                WHERE {
-                  ?prop a ?t .
-                  FILTER(?t IN (owl:ObjectProperty, owl:DatatypeProperty, rdf:Property, owl:AnnotationProperty))
-
-                  BIND(
-                    IF(?t = owl:ObjectProperty, "Object",
-                      IF(?t = owl:DatatypeProperty, "Datatype",
-                        IF(?t = owl:AnnotationProperty, "Annotation", "Generic")
-                      )
-                    ) AS ?kind
-                  )
-
-                  OPTIONAL { ?prop rdfs:label ?label . }
-                  OPTIONAL { ?prop rdfs:domain ?domain . }
-                  OPTIONAL { ?prop rdfs:range ?range . }
-                }
-                ORDER BY ?kind ?label
-            """,
-            "DFO: all EscapementMethod subclasses": """
-                PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                PREFIX owl:  <http://www.w3.org/2002/07/owl#>
-                PREFIX dfo:  <https://w3id.org/dfo/salmon#>
-
-                SELECT ?method ?label
-                WHERE {
-                  ?method rdfs:subClassOf* dfo:EscapementMethod .
-                  OPTIONAL { ?method rdfs:label ?label . }
-                }
-                ORDER BY ?label
-            """,
-            "DFO: MU → CU → Stock chain": """
-                PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                PREFIX dfo:  <https://w3id.org/dfo/salmon#>
-
-                SELECT ?mu ?muLabel ?cu ?cuLabel ?stock ?stockLabel
-                WHERE {
-                  ?mu a dfo:ManagementUnit .
-                  OPTIONAL { ?mu rdfs:label ?muLabel . }
-
-                  ?cu dfo:isMemberOfMU ?mu .
-                  OPTIONAL { ?cu rdfs:label ?cuLabel . }
-
-                  ?stock dfo:isMemberOfCU ?cu .
-                  OPTIONAL { ?stock rdfs:label ?stockLabel . }
-                }
-                ORDER BY ?muLabel ?cuLabel ?stockLabel
-            """,
-        }
-
-
-        selected_example = st.selectbox(
-            "Example query",
-            options=["(None)"] + list(example_queries.keys()),
-        )
-
-        if selected_example != "(None)":
-            query_default = example_queries[selected_example]
-        else:
-            query_default = "SELECT * WHERE { ?s ?p ?o } LIMIT 25"
-
-        query_text = st.text_area(
-            "SPARQL query",
-            value=query_default,
-            height=220,
-        )
-
-        if st.button("Run query"):
-            with st.spinner("Running SPARQL query…"):
-                df_res, err = run_sparql(g, query_text)
-
-            if err:
-                st.error(f"SPARQL error: {err}")
-            elif df_res is not None and not df_res.empty:
-                st.success(f"Query returned {len(df_res)} rows.")
-                st.dataframe(df_res, width='stretch')
-            else:
-                st.info("Query returned no results.")
+        render_sparql_tab(g)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,277 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+import pytest
+from rdflib import Graph, URIRef
+
+import app
+
+
+DFO = "http://example.org/dfo#"
+
+TTL = f"""
+@prefix dfo: <{DFO}> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+
+dfo:Salmon a owl:Class ; rdfs:label "Salmon" ; rdfs:subClassOf dfo:Fish .
+dfo:Fish a owl:Class ; rdfs:label "Fish" .
+""".encode("utf-8")
+
+
+def _graph(ttl: bytes = TTL):
+    g = Graph()
+    g.parse(data=ttl.decode("utf-8"), format="turtle")
+    return g
+
+
+@pytest.fixture
+def graph_cache(tmp_path, monkeypatch):
+    """Point snapshots at a temp dir and serve raw URLs from a dict."""
+    bodies = {}
+    fetched = []
+
+    def fake_cached_get(url):
+        fetched.append(url)
+        return bodies[url], None
+
+    monkeypatch.setattr(app, "GRAPH_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "cached_get", fake_cached_get)
+    return bodies, fetched
+
+
+# -------------------------------------------------------------------
+# SPARQL
+# -------------------------------------------------------------------
+
+@pytest.mark.parametrize("store", ["default", "Oxigraph"])
+def test_run_sparql_uses_graph_prefixes(monkeypatch, store):
+    # "Oxigraph" only changes run_sparql's path (query text, not prepared)
+    monkeypatch.setattr(app, "GRAPH_STORE", store)
+    df, err = app.run_sparql(_graph(), "SELECT ?c WHERE { ?c rdfs:subClassOf dfo:Fish }")
+    assert err is None
+    assert df["c"].tolist() == [DFO + "Salmon"]
+
+
+def test_run_sparql_empty_result_keeps_columns():
+    df, err = app.run_sparql(
+        _graph(), "SELECT ?c ?label WHERE { ?c a dfo:Missing ; rdfs:label ?label }"
+    )
+    assert err is None
+    assert list(df.columns) == ["c", "label"]
+    assert df.empty
+
+
+def test_run_sparql_unbound_values_are_blank():
+    df, err = app.run_sparql(
+        _graph(),
+        "SELECT ?c ?parent WHERE { ?c a owl:Class OPTIONAL { ?c rdfs:subClassOf ?parent } }",
+    )
+    assert err is None
+    assert dict(zip(df["c"], df["parent"])) == {DFO + "Salmon": DFO + "Fish", DFO + "Fish": ""}
+
+
+def test_run_sparql_reports_errors():
+    df, err = app.run_sparql(_graph(), "SELECT WHERE {")
+    assert df is None
+    assert err
+
+
+def _job(result=None, exc=None):
+    job = Future()
+    if exc is not None:
+        job.set_exception(exc)
+    else:
+        job.set_result(result)
+    return job
+
+
+def _rows(n):
+    return pd.DataFrame({"x": range(n)}), None
+
+
+def test_settle_sparql_job_forgets_failures():
+    lock = threading.Lock()
+    jobs = OrderedDict()
+    for key, job in [
+        ("error", _job((None, "bad query"))),
+        ("raised", _job(exc=RuntimeError("boom"))),
+        ("ok", _job(_rows(1))),
+    ]:
+        jobs[key] = job
+        app._settle_sparql_job(jobs, lock, key, job)
+    assert list(jobs) == ["ok"]
+
+    cancelled = Future()
+    cancelled.cancel()
+    jobs["cancelled"] = cancelled
+    app._settle_sparql_job(jobs, lock, "cancelled", cancelled)
+    assert list(jobs) == ["ok"]
+
+
+def test_settle_sparql_job_evicts_oldest_rows(monkeypatch):
+    monkeypatch.setattr(app, "SPARQL_CACHE_MAX_ROWS", 10)
+    lock = threading.Lock()
+    jobs = OrderedDict()
+    jobs["old"] = _job(_rows(4))
+    jobs["running"] = Future()
+    jobs["mid"] = _job(_rows(4))
+    jobs["new"] = _job(_rows(4))
+    app._settle_sparql_job(jobs, lock, "new", jobs["new"])
+    assert list(jobs) == ["running", "mid", "new"]
+
+    # The job being settled is kept even when it alone is over budget
+    jobs["huge"] = _job(_rows(50))
+    app._settle_sparql_job(jobs, lock, "huge", jobs["huge"])
+    assert list(jobs) == ["running", "huge"]
+
+
+# -------------------------------------------------------------------
+# GitHub snapshots
+# -------------------------------------------------------------------
+
+def test_load_github_ttl_snapshot_round_trip(graph_cache):
+    bodies, fetched = graph_cache
+    bodies["raw/a.ttl"] = TTL
+
+    first = app._load_github_ttl("raw/a.ttl")
+    assert fetched == ["raw/a.ttl"]
+
+    # The listed blob SHA finds the snapshot without any request
+    warm = app._load_github_ttl("raw/a.ttl", sha=app._blob_sha(TTL))
+    assert fetched == ["raw/a.ttl"]
+    assert set(warm) == set(first)
+    assert dict(warm.namespaces())["dfo"] == URIRef(DFO)
+
+    df, err = app.run_sparql(warm, "SELECT ?c WHERE { ?c rdfs:label \"Salmon\" }")
+    assert err is None and df["c"].tolist() == [DFO + "Salmon"]
+
+
+def test_load_github_ttl_ignores_snapshot_without_namespaces(graph_cache):
+    bodies, fetched = graph_cache
+    bodies["raw/a.ttl"] = TTL
+    app._load_github_ttl("raw/a.ttl")
+    snapshot = app._snapshot_path(app._blob_sha(TTL))
+    os.remove(app._namespaces_path(snapshot))
+
+    g = app._load_github_ttl("raw/a.ttl", sha=app._blob_sha(TTL))
+    assert fetched == ["raw/a.ttl", "raw/a.ttl"]
+    assert dict(g.namespaces())["dfo"] == URIRef(DFO)
+    assert os.path.exists(app._namespaces_path(snapshot))
+
+
+def test_snapshots_are_pruned_least_recently_used_first(graph_cache, monkeypatch):
+    bodies, _ = graph_cache
+    monkeypatch.setattr(app, "GRAPH_CACHE_MAX_FILES", 2)
+    versions = [TTL + f"dfo:V{i} a dfo:Fish .\n".encode() for i in range(3)]
+    snapshots = [app._snapshot_path(app._blob_sha(body)) for body in versions]
+
+    for i, body in enumerate(versions[:2]):
+        bodies[f"raw/{i}"] = body
+        app._load_github_ttl(f"raw/{i}")
+        os.utime(snapshots[i], (i, i))
+    # Reading version 0 makes version 1 the least recently used
+    app._load_github_ttl("raw/0", sha=app._blob_sha(versions[0]))
+
+    bodies["raw/2"] = versions[2]
+    app._load_github_ttl("raw/2")
+
+    assert sorted(os.listdir(app.GRAPH_CACHE_DIR)) == sorted(
+        os.path.basename(path)
+        for snapshot in (snapshots[0], snapshots[2])
+        for path in (snapshot, app._namespaces_path(snapshot))
+    )
+
+
+def test_load_graphs_from_github_merges_prefixes(graph_cache):
+    bodies, _ = graph_cache
+    other = b"@prefix ex: <http://example.org/ex#> .\nex:a ex:b ex:c .\n"
+    branch = "test/merge"
+    bodies[f"{app.GITHUB_RAW_BASE}/{branch}/a.ttl"] = TTL
+    bodies[f"{app.GITHUB_RAW_BASE}/{branch}/b.ttl"] = other
+
+    g = app.load_graphs_from_github(("a.ttl", "b.ttl"), branch=branch)
+    namespaces = dict(g.namespaces())
+    assert namespaces["dfo"] == URIRef(DFO)
+    assert namespaces["ex"] == URIRef("http://example.org/ex#")
+    assert len(g) == len(_graph()) + 1
+
+
+# -------------------------------------------------------------------
+# Graph views
+# -------------------------------------------------------------------
+
+def test_minigraph_to_json():
+    G = app.MiniGraph()
+    G.nodes = {"a": {"label": "A", "role": "focus"}, "b": {"label": "B"}}
+    G.edges = [("a", "b", "subClassOf")]
+    data = app.graph_to_json_dict(G)
+    assert data["nodes"] == [
+        {"id": "a", "label": "A", "role": "focus"},
+        {"id": "b", "label": "B", "role": None},
+    ]
+    assert [(e["source"], e["target"]) for e in data["edges"]] == [("a", "b")]
+    assert '"subClassOf"' in app.graph_to_json_text(G)
+
+
+def _chain(n):
+    """C0 <- C1 <- ... <- C(n-1), each a subclass of the previous one."""
+    lines = [f"@prefix dfo: <{DFO}> .", "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> ."]
+    lines += [f"dfo:C{i} rdfs:subClassOf dfo:C{i - 1} ." for i in range(1, n)]
+    return _graph("\n".join(lines).encode("utf-8"))
+
+
+@pytest.mark.parametrize("depth, shown", [(1, range(1, 6)), (2, range(0, 7)), (4, range(0, 7))])
+def test_build_class_subclass_graph_depth(depth, shown):
+    G = app.build_class_subclass_graph(_chain(7), URIRef(DFO + "C3"), max_depth=depth)
+    assert set(G.nodes) == {DFO + f"C{i}" for i in shown}
+    roles = {iri[len(DFO):]: data["role"] for iri, data in G.nodes.items()}
+    assert roles["C3"] == "focus"
+    assert roles["C2"] == "ancestor" and roles["C4"] == "descendant"
+    # Every edge is listed once, child under parent
+    assert len(G.edges) == len(set(G.edges)) == len(G.nodes) - 1
+
+
+# -------------------------------------------------------------------
+# Tables
+# -------------------------------------------------------------------
+
+@pytest.fixture
+def page_input(monkeypatch):
+    """Stand-in for st.number_input that returns the page held in session state."""
+    calls = []
+
+    def fake_number_input(label, min_value, max_value, key):
+        calls.append((min_value, max_value))
+        return app.st.session_state.get(key, min_value)
+
+    monkeypatch.setattr(app.st, "number_input", fake_number_input)
+    monkeypatch.setattr(app.st, "caption", lambda *args, **kwargs: None)
+    for key in [k for k in app.st.session_state if k.startswith("t_")]:
+        del app.st.session_state[key]
+    return calls
+
+
+def test_paginate_single_page_has_no_input(page_input):
+    df = pd.DataFrame({"x": range(app.TABLE_PAGE_SIZE)})
+    assert app.paginate(df, "t").equals(df)
+    assert page_input == []
+
+
+def test_paginate_last_page_is_partial(page_input):
+    df = pd.DataFrame({"x": range(2 * app.TABLE_PAGE_SIZE + 5)})
+    app.st.session_state["t_page"] = 3
+    page = app.paginate(df, "t")
+    assert page_input == [(1, 3)]
+    assert page["x"].tolist() == list(range(2 * app.TABLE_PAGE_SIZE, len(df)))
+
+
+def test_paginate_resets_stale_page(page_input):
+    df = pd.DataFrame({"x": range(app.TABLE_PAGE_SIZE + 1)})
+    app.st.session_state["t_page"] = 9
+    page = app.paginate(df, "t")
+    assert app.st.session_state["t_page"] == 1
+    assert page["x"].tolist() == list(range(app.TABLE_PAGE_SIZE))